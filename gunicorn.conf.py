@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Production server settings: several Uvicorn workers behind one Gunicorn master.
+# Start with: gunicorn main:app
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+worker_connections = 1000
@@ -3,21 +3,36 @@
 # It runs a web server to provide an admin panel AND checks for trading signals in the background.
 
 import os
+import sys
 import asyncio
-import json
-from datetime import datetime
+import hmac
+import ssl
+import time
 from typing import Dict, List, Optional
 from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
 import random
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and gunicorn doesn't run there, so there is only ever one worker.
+    fcntl = None
 
+import aiofiles
+import aiohttp
+import certifi
+import orjson
 import ccxt.async_support as ccxt
+import ccxt.pro as ccxtpro
+import numpy as np
 import pandas as pd
-import talib
 import telegram
+from telegram.request import HTTPXRequest
 from dotenv import load_dotenv
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict
 import uvicorn
 
 # --- SETUP & CONFIGURATION ---
@@ -39,7 +54,11 @@ for i in range(1, 5):
 
 # --- File Paths for Persistence ---
 CONFIG_FILE = "config.json"
-HISTORY_FILE = "trade_history.json"
+HISTORY_FILE = "trade_history.jsonl"
+LEGACY_HISTORY_FILE = "trade_history.json"
+STATUS_FILE = "bot_status.json"
+SCHEDULER_LOCK_FILE = ".scheduler.lock"
+FORCE_CHECK_FILE = ".force_check"
 
 # --- Default Bot Configuration ---
 DEFAULT_CONFIG = {
@@ -57,39 +76,297 @@ DEFAULT_CONFIG = {
 }
 
 # --- Functions to load and save settings ---
-def load_json(file_path, default_data):
+# Parsed file contents, cached until the file is written again (see file_changed). Treat results as read-only.
+@lru_cache(maxsize=None)
+def _read_file(file_path):
     if not os.path.exists(file_path):
-        return default_data
-    with open(file_path, 'r') as f:
+        return None
+    with open(file_path, 'rb') as f:
         try:
-            saved_data = json.load(f)
-            if isinstance(default_data, dict):
-                updated_config = default_data.copy()
-                updated_config.update(saved_data)
-                return updated_config
-            elif isinstance(saved_data, list):
-                return saved_data
-            else:
-                return default_data
-        except json.JSONDecodeError:
-            return default_data
+            return orjson.loads(f.read())
+        except orjson.JSONDecodeError:
+            return None
+
+def load_json(file_path, default_data):
+    saved_data = _read_file(file_path)
+    if saved_data is None:
+        return default_data
+    if isinstance(default_data, dict):
+        updated_config = default_data.copy()
+        updated_config.update(saved_data)
+        return updated_config
+    elif isinstance(saved_data, list):
+        return list(saved_data)
+    else:
+        return default_data
+
+# Serializes writers within this worker; file_lock adds an flock so other gunicorn workers wait too.
+_save_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def file_lock(file_path):
+    # The flock is taken on a .lock file next to the target, because _replace_file swaps the target's inode.
+    # Without fcntl (Windows) there is only ever one worker, so _save_lock alone is enough.
+    async with _save_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(file_path + '.lock', 'a') as lock_file:
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+async def _replace_file(file_path, payload):
+    # Write to a temp file and atomically swap it in, so readers never see a half-written file.
+    # The temp name is per process, so workers never write into each other's. Callers must hold file_lock.
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    async with aiofiles.open(tmp_path, 'wb') as f:
+        await f.write(payload)
+    os.replace(tmp_path, file_path)
+    _read_file.cache_clear()
+    file_changed(file_path)
+
+async def save_json_async(file_path, data):
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    async with file_lock(file_path):
+        await _replace_file(file_path, payload)
+
+# --- Trade history persistence ---
+# The history file is JSON lines, oldest first: a new signal appends one line instead of rewriting the file.
+# Once it grows past HISTORY_COMPACT_BYTES it is rewritten with just the newest HISTORY_MAX_ENTRIES lines.
+HISTORY_MAX_ENTRIES = 50
+HISTORY_COMPACT_BYTES = 64 * 1024
+
+def load_history():
+    # Returns the newest HISTORY_MAX_ENTRIES entries, newest first. The file is streamed line by line
+    # into a bounded deque, so it is never read into memory whole; a torn last line is skipped.
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    entries = deque(maxlen=HISTORY_MAX_ENTRIES)
+    with open(HISTORY_FILE, 'rb') as f:
+        for line in f:
+            try:
+                entries.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
+    entries.reverse()
+    return list(entries)
+
+def migrate_legacy_history():
+    # One-off conversion of the old single-array trade_history.json (newest first).
+    if os.path.exists(HISTORY_FILE) or not os.path.exists(LEGACY_HISTORY_FILE):
+        return
+    entries = load_json(LEGACY_HISTORY_FILE, [])
+    with open(HISTORY_FILE, 'wb') as f:
+        f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in reversed(entries)))
+
+async def append_history(entry):
+    # Appending and compacting happen under the same flock, so a line is never appended to a file
+    # that another worker's compaction is about to replace.
+    async with file_lock(HISTORY_FILE):
+        async with aiofiles.open(HISTORY_FILE, 'ab') as f:
+            await f.write(orjson.dumps(entry) + b"\n")
+        file_changed(HISTORY_FILE)
+        if os.path.getsize(HISTORY_FILE) > HISTORY_COMPACT_BYTES:
+            entries = load_history()
+            await _replace_file(HISTORY_FILE, b"".join(orjson.dumps(e) + b"\n" for e in reversed(entries)))
 
-def save_json(file_path, data):
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=4)
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-run.
+_background_tasks = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+def _background_task_done(task):
+    # Nobody awaits these tasks, so a failure (e.g. a save after the caller already answered "success") is reported here.
+    _background_tasks.discard(task)
+    if task.cancelled() or task.exception() is None: return
+    print(f"Background task error: {task.exception()}")
+    bot_status["last_error"] = f"Background Task Error: {task.exception()}"
+
+# Local-time stamps for status and history, formatted at most once per second for each format.
+_timestamp_cache = {}
+
+def timestamp(fmt="%Y-%m-%d %H:%M:%S"):
+    now = int(time.time())
+    cached = _timestamp_cache.get(fmt)
+    if cached and cached[0] == now: return cached[1]
+    text = time.strftime(fmt, time.localtime(now))
+    _timestamp_cache[fmt] = (now, text)
+    return text
+
+# --- Multi-worker support ---
+# Under gunicorn every worker is a separate process with its own copy of the state below.
+# Workers persist their changes to disk, and re-read a file only when its mtime moved.
+_file_mtimes = {}
+
+def file_changed(file_path):
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    changed = _file_mtimes.get(file_path) != mtime
+    _file_mtimes[file_path] = mtime
+    if changed: _read_file.cache_clear()
+    return changed
+
+def sync_shared_state():
+    global trade_history
+    if file_changed(CONFIG_FILE):
+        periods = indicator_periods(bot_config)
+        bot_config.update(load_json(CONFIG_FILE, DEFAULT_CONFIG))
+        refresh_active_symbols()
+        invalidate_indicators(periods)
+    if file_changed(HISTORY_FILE):
+        trade_history = history_frame(load_history())
+        rebuild_history_cache()
+    if file_changed(STATUS_FILE):
+        bot_status["last_check"] = load_json(STATUS_FILE, {"last_check": bot_status["last_check"]})["last_check"]
+
+# Only the worker holding this lock runs the background signal checker.
+_scheduler_lock_file = None
+
+def acquire_scheduler_lock():
+    global _scheduler_lock_file
+    if fcntl is None: return True
+    lock_file = open(SCHEDULER_LOCK_FILE, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _scheduler_lock_file = lock_file
+    return True
 
 # --- Initialize bot state ---
 bot_config = load_json(CONFIG_FILE, DEFAULT_CONFIG)
-trade_history = deque(load_json(HISTORY_FILE, []), maxlen=50) 
+# active_symbols frozen into a tuple of interned strings; rebuilt whenever the config is loaded or changed.
+ACTIVE_SYMBOLS: tuple = ()
+
+def refresh_active_symbols():
+    global ACTIVE_SYMBOLS
+    ACTIVE_SYMBOLS = tuple(sys.intern(s) for s in bot_config['active_symbols'])
+
+refresh_active_symbols()
+migrate_legacy_history()
+
+# In memory the history is a small DataFrame, oldest row first, with numeric price columns.
+# Prices are only formatted when the history is serialized for the dashboard.
+HISTORY_COLUMNS = ['time', 'asset', 'type', 'entry', 'sl']
+
+def _price(value):
+    # Older history lines store prices as formatted strings like "63,596.94".
+    if value is None: return float('nan')
+    return float(str(value).replace(',', ''))
+
+def history_row(entry):
+    time_str = f"{entry['date']} {entry['time']}" if 'date' in entry else entry.get('time', '')
+    entry_price = entry.get('entry', entry.get('entry_price', entry.get('price')))
+    sl_price = entry.get('sl', entry.get('sl_price'))
+    return [time_str, entry.get('asset', ''), entry.get('type', ''), _price(entry_price), _price(sl_price)]
+
+def history_frame(entries):
+    # entries come newest first, as returned by load_history.
+    return pd.DataFrame([history_row(e) for e in reversed(entries)], columns=HISTORY_COLUMNS)
+
+def add_to_history(entry):
+    global trade_history
+    row = pd.DataFrame([history_row(entry)], columns=HISTORY_COLUMNS)
+    trade_history = row if trade_history.empty else pd.concat([trade_history, row], ignore_index=True)
+    trade_history = trade_history.tail(HISTORY_MAX_ENTRIES).reset_index(drop=True)
+    rebuild_history_cache()
+
+def recent_history(n=10):
+    recent = trade_history.iloc[::-1].head(n)
+    return [{"time": t, "asset": asset, "type": kind,
+             "entry_price": f"{entry:,.2f}", "sl_price": f"{sl:,.2f}" if sl == sl else "N/A"}
+            for t, asset, kind, entry, sl in recent.itertuples(index=False)]
+
+trade_history = history_frame(load_history())
+# The 10 most recent signals, pre-serialized. History only changes on a signal, so the polled endpoint just returns these bytes.
+_history_cache = b"[]"
+
+def rebuild_history_cache():
+    global _history_cache
+    _history_cache = orjson.dumps(recent_history())
+
+rebuild_history_cache()
 bot_status = {"status": "Working", "last_check": "Never", "binance_connection": "Connecting...", "last_error": "None", "market_type": "Futures"}
 open_trades = 0
+for _path in (CONFIG_FILE, HISTORY_FILE, STATUS_FILE, FORCE_CHECK_FILE): file_changed(_path)
 
 # --- CONNECTIONS ---
-binance = ccxt.binance({
+# One persistent client per market. defaultType is fixed at construction and never changed afterwards,
+# so concurrent handlers can't flip the market under each other's in-flight requests.
+binance_futures = ccxt.binance({
     'apiKey': BINANCE_API_KEY,
     'secret': BINANCE_SECRET,
+    'enableRateLimit': True,
     'options': {'defaultType': 'future'},
 })
+binance_spot = ccxt.binance({
+    'apiKey': BINANCE_API_KEY,
+    'secret': BINANCE_SECRET,
+    'enableRateLimit': True,
+    'options': {'defaultType': 'spot'},
+})
+
+# Both REST clients share one keep-alive connection pool, so the OHLCV fetches on every check reuse
+# warm TLS connections instead of each client handshaking on its own. Created on startup, inside the loop.
+_http_session: Optional[aiohttp.ClientSession] = None
+
+def open_http_session():
+    global _http_session
+    connector = aiohttp.TCPConnector(ssl=ssl.create_default_context(cafile=certifi.where()), limit=64, limit_per_host=32,
+                                     keepalive_timeout=120, ttl_dns_cache=300, enable_cleanup_closed=True)
+    _http_session = aiohttp.ClientSession(connector=connector)
+    for client in (binance_futures, binance_spot):
+        client.session, client.own_session = _http_session, False
+
+# Streaming clients for live prices. Binance pushes ticker updates over a websocket, so
+# /api/live_prices and the dashboard socket just read the latest values from memory.
+binance_pro_futures = ccxtpro.binance({'options': {'defaultType': 'future'}})
+binance_pro_spot = ccxtpro.binance({'options': {'defaultType': 'spot'}})
+LIVE_PRICE_SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'XRP/USDT', 'BNB/USDT']
+live_price_data: Dict[str, dict] = {}
+_price_watcher: Optional[asyncio.Task] = None
+
+async def watch_live_prices():
+    # Futures first. After a few consecutive failures switch to the other market, like the old REST fallback did.
+    markets = [("Futures", binance_pro_futures), ("Spot", binance_pro_spot)]
+    current, failures = 0, 0
+    aliases = {}
+    while True:
+        name, client = markets[current]
+        try:
+            tickers = await client.watch_tickers(LIVE_PRICE_SYMBOLS)
+            if name not in aliases:
+                # The futures client reports unified symbols (BTC/USDT:USDT); the dashboard and /api/live_prices
+                # are keyed by the symbols asked for (BTC/USDT).
+                aliases[name] = {client.symbol(s): s for s in LIVE_PRICE_SYMBOLS}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failures += 1
+            print(f"Price stream error on {name}: {e}")
+            bot_status.update({"binance_connection": "Price Fetch Failed", "last_error": str(e)})
+            if failures >= 3:
+                current, failures = 1 - current, 0
+                live_price_data.clear()
+            await asyncio.sleep(min(failures, 5))
+            continue
+
+        if bot_status["binance_connection"] != "Connected":
+            bot_status.update({"binance_connection": "Connected", "last_error": "None"})
+        bot_status["market_type"] = name if current == 0 else f"{name} (Fallback)"
+        failures = 0
+        live_price_data.update({aliases[name].get(s, s): {"price": t['last'], "change": t['percentage']}
+                                for s, t in tickers.items()})
 
 # --- HTML FRONTEND (with PIN screen, history table, status, and theme) ---
 HTML_TEMPLATE = """
@@ -262,6 +539,24 @@ HTML_TEMPLATE = """
 
         function startApp() {
             fetchSettings();
+            connectSocket();
+        }
+
+        // Live updates are pushed over one WebSocket. If the host can't open one, fall back to polling.
+        function connectSocket() {
+            const ws = new WebSocket(`${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/ws`);
+            let opened = false;
+            ws.onopen = () => { opened = true; };
+            ws.onmessage = (e) => {
+                const msg = JSON.parse(e.data);
+                if (msg.prices) renderPrices(msg.prices);
+                if (msg.status) renderStatus(msg.status);
+                if (msg.history) renderHistory(msg.history);
+            };
+            ws.onclose = () => { if (opened) setTimeout(connectSocket, 3000); else startPolling(); };
+        }
+
+        function startPolling() {
             setInterval(fetchPrices, 10000); fetchPrices();
             setInterval(fetchStatus, 5000); fetchStatus();
             setInterval(fetchHistory, 5000); fetchHistory();
@@ -300,22 +595,28 @@ HTML_TEMPLATE = """
             try {
                 const response = await fetch('/api/live_prices');
                 if (!response.ok) { return; }
-                const prices = await response.json();
-                ['BTC/USDT', 'ETH/USDT', 'XRP/USDT', 'BNB/USDT'].forEach(symbol => {
-                    const el = document.getElementById(`price-${symbol.replace('/', '')}`);
-                    if (!el) return;
-                    const priceData = prices[symbol];
-                    if (priceData && typeof priceData.price === 'number') {
-                        el.innerHTML = `<div class="font-bold text-lg">${symbol.replace('/USDT', '')}</div><div class="text-2xl font-mono ${priceData.change >= 0 ? 'text-green-400' : 'text-red-400'}">$${priceData.price.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 4})}</div><div class="text-sm ${priceData.change >= 0 ? 'text-green-500' : 'text-red-500'}">${priceData.change.toFixed(2)}%</div>`;
-                    } else {
-                        el.innerHTML = `<div class="font-bold text-lg">${symbol.replace('/USDT', '')}</div><div class="text-gray-500">N/A</div>`;
-                    }
-                });
+                renderPrices(await response.json());
             } catch (error) { console.error("Error fetching prices:", error); }
         }
 
+        function renderPrices(prices) {
+            ['BTC/USDT', 'ETH/USDT', 'XRP/USDT', 'BNB/USDT'].forEach(symbol => {
+                const el = document.getElementById(`price-${symbol.replace('/', '')}`);
+                if (!el) return;
+                const priceData = prices[symbol];
+                if (priceData && typeof priceData.price === 'number') {
+                    el.innerHTML = `<div class="font-bold text-lg">${symbol.replace('/USDT', '')}</div><div class="text-2xl font-mono ${priceData.change >= 0 ? 'text-green-400' : 'text-red-400'}">$${priceData.price.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 4})}</div><div class="text-sm ${priceData.change >= 0 ? 'text-green-500' : 'text-red-500'}">${priceData.change.toFixed(2)}%</div>`;
+                } else {
+                    el.innerHTML = `<div class="font-bold text-lg">${symbol.replace('/USDT', '')}</div><div class="text-gray-500">N/A</div>`;
+                }
+            });
+        }
+
         async function fetchStatus() {
-            const res = await fetch('/api/status'); const data = await res.json();
+            const res = await fetch('/api/status'); renderStatus(await res.json());
+        }
+
+        function renderStatus(data) {
             const statusColor = data.status === 'Working' ? 'text-green-500' : 'text-yellow-500';
             const binanceColor = data.binance_connection === 'Connected' ? 'text-green-500' : 'text-red-500';
             let statusHTML = `
@@ -330,7 +631,10 @@ HTML_TEMPLATE = """
         }
 
         async function fetchHistory() {
-            const res = await fetch('/api/trade_history'); const data = await res.json();
+            const res = await fetch('/api/trade_history'); renderHistory(await res.json());
+        }
+
+        function renderHistory(data) {
             const tableBody = document.getElementById('history-table');
             tableBody.innerHTML = data.map(trade => `
                 <tr class="border-b border-border-light dark:border-border-dark">
@@ -418,107 +722,155 @@ HTML_TEMPLATE = """
 </body>
 </html>
 """
+# Encoded once at import: the page is static. Each request still gets its own Response, because
+# GZipMiddleware rewrites the headers of the response it is handed.
+INDEX_BYTES = HTML_TEMPLATE.encode()
+
+# --- REQUEST BODIES ---
+class PinBody(BaseModel):
+    pin: str
+
+class TelegramChannel(BaseModel):
+    id: int
+    name: str
+    active: bool
+
+class SettingsBody(BaseModel):
+    # Every field is optional: the admin panel only posts the settings it shows. Unknown keys are kept as before.
+    model_config = ConfigDict(extra='allow')
+    active_symbols: Optional[List[str]] = None
+    entry_timeframe: Optional[str] = None
+    higher_timeframes: Optional[List[str]] = None
+    max_open_trades: Optional[int] = None
+    rsi_period: Optional[int] = None
+    rsi_oversold: Optional[float] = None
+    rsi_overbought: Optional[float] = None
+    volume_avg_period: Optional[int] = None
+    volume_factor: Optional[float] = None
+    ema_short_period: Optional[int] = None
+    ema_long_period: Optional[int] = None
+    ema_entry_period: Optional[int] = None
+    atr_period: Optional[int] = None
+    atr_stop_loss_factor: Optional[float] = None
+    atr_take_profit_factor: Optional[float] = None
+    telegram_channels: Optional[List[TelegramChannel]] = None
 
 # --- FASTAPI WEB SERVER ---
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+# Compresses the admin page and the polled JSON for clients that send Accept-Encoding: gzip.
+app.add_middleware(GZipMiddleware, minimum_size=500)
+SUCCESS_BYTES = orjson.dumps({"status": "success"})
+
+def success_response(): return Response(SUCCESS_BYTES, media_type="application/json")
 
 @app.get("/", response_class=HTMLResponse)
-async def get_admin_panel(): return HTML_TEMPLATE
+async def get_admin_panel(): return Response(INDEX_BYTES, media_type="text/html")
 
 @app.post("/api/verify_pin")
-async def verify_pin(req: Request):
-    data = await req.json()
-    if data.get("pin") == BOT_PIN: return JSONResponse({"status": "success"})
+async def verify_pin(body: PinBody):
+    if hmac.compare_digest(body.pin.encode(), BOT_PIN.encode()): return success_response()
     raise HTTPException(status_code=401, detail="Incorrect PIN")
 
 @app.get("/api/settings")
-async def get_settings(): return JSONResponse(bot_config)
+async def get_settings():
+    sync_shared_state()
+    return ORJSONResponse(bot_config)
 @app.get("/api/status")
-async def get_status(): return JSONResponse(bot_status)
+async def get_status():
+    sync_shared_state()
+    return ORJSONResponse(bot_status)
 @app.get("/api/trade_history")
-async def get_trade_history(): return JSONResponse(list(trade_history)[:10])
+async def get_trade_history():
+    sync_shared_state()
+    return Response(content=_history_cache, media_type="application/json")
 
-@app.post("/api/connectivity_test")
-async def connectivity_test():
-    futures_ok, futures_res = False, ""
-    spot_ok, spot_res = False, ""
-    
+async def _probe(client, empty_message):
     try:
-        binance.options['defaultType'] = 'future'
-        ticker = await binance.fetch_ticker('BTC/USDT')
+        ticker = await client.fetch_ticker('BTC/USDT')
         if ticker and 'last' in ticker:
-            futures_ok = True; futures_res = f"Success! Last price: ${ticker['last']}"
-        else:
-            futures_res = "Connection OK, but received empty data. Please check if your Binance account is fully activated for Futures trading (e.g., have you completed the Futures Quiz?)."
-    except Exception as e: futures_res = f"Error: {e}"
+            return True, f"Success! Last price: ${ticker['last']}"
+        return False, empty_message
+    except Exception as e: return False, f"Error: {e}"
 
-    try:
-        binance.options['defaultType'] = 'spot'
-        ticker = await binance.fetch_ticker('BTC/USDT')
-        if ticker and 'last' in ticker:
-            spot_ok = True; spot_res = f"Success! Last price: ${ticker['last']}"
-        else: spot_res = "Connection OK, but received empty data."
-    except Exception as e: spot_res = f"Error: {e}"
+@app.post("/api/connectivity_test")
+async def connectivity_test():
+    (futures_ok, futures_res), (spot_ok, spot_res) = await asyncio.gather(
+        _probe(binance_futures, "Connection OK, but received empty data. Please check if your Binance account is fully activated for Futures trading (e.g., have you completed the Futures Quiz?)."),
+        _probe(binance_spot, "Connection OK, but received empty data."),
+    )
         
-    return JSONResponse({
+    return ORJSONResponse({
         "futures_success": futures_ok, "futures_result": futures_res,
         "spot_success": spot_ok, "spot_result": spot_res
     })
 
 @app.get("/api/live_prices")
 async def live_prices():
-    global bot_status
-    symbols = ['BTC/USDT', 'ETH/USDT', 'XRP/USDT', 'BNB/USDT']
-    tickers = {}
-    
-    market_to_try = 'future'
-    try:
-        active_market = bot_status.get("market_type", "Futures").lower()
-        if "spot" in active_market: market_to_try = 'spot'
-        binance.options['defaultType'] = market_to_try
-        
-        for symbol in symbols:
-            try:
-                ticker_data = await binance.fetch_ticker(symbol)
-                if ticker_data: tickers[symbol] = ticker_data
-            except Exception as e: print(f"Could not fetch {symbol} from {market_to_try}: {e}")
-                
-        if tickers:
-            bot_status.update({"binance_connection": "Connected", "last_error": "None", "market_type": market_to_try.capitalize()})
-            return JSONResponse({s: {"price": t['last'], "change": t['percentage']} for s, t in tickers.items()})
+    if not live_price_data: return ORJSONResponse({}, status_code=500)
+    return ORJSONResponse(live_price_data)
 
-        fallback_market = 'spot' if market_to_try == 'future' else 'future'
-        print(f"Primary market '{market_to_try}' empty, trying fallback '{fallback_market}'...")
-        binance.options['defaultType'] = fallback_market
-        
-        for symbol in symbols:
-            try:
-                ticker_data = await binance.fetch_ticker(symbol)
-                if ticker_data: tickers[symbol] = ticker_data
-            except Exception as e: print(f"Could not fetch {symbol} from {fallback_market}: {e}")
+# --- Dashboard push channel ---
+# One socket per admin tab replaces the three polling loops. Status and prices go out every tick,
+# history only when it changed.
+PUSH_INTERVAL = 2.0
 
-        if tickers:
-            bot_status.update({"binance_connection": "Connected", "last_error": "None", "market_type": f"{fallback_market.capitalize()} (Fallback)"})
-            return JSONResponse({s: {"price": t['last'], "change": t['percentage']} for s, t in tickers.items()})
-        
-        raise Exception("Failed to fetch price data from both Futures and Spot markets.")
-    except Exception as e:
-        bot_status.update({"binance_connection": "Price Fetch Failed", "last_error": str(e)})
-        return JSONResponse({}, status_code=500)
+@app.websocket("/ws")
+async def dashboard_socket(ws: WebSocket):
+    await ws.accept()
+    sent_history = None
+    try:
+        while True:
+            sync_shared_state()
+            frame = {"status": bot_status}
+            if live_price_data: frame["prices"] = live_price_data
+            if _history_cache is not sent_history:
+                sent_history = _history_cache
+                frame["history"] = recent_history()
+            await ws.send_text(orjson.dumps(frame).decode())
+            await asyncio.sleep(PUSH_INTERVAL)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
 
 @app.post("/api/settings")
-async def update_settings(req: Request):
-    data = await req.json()
-    bot_config.update(data)
-    save_json(CONFIG_FILE, bot_config)
+async def update_settings(body: SettingsBody):
+    sync_shared_state()
+    periods = indicator_periods(bot_config)
+    # exclude_none: an empty number field arrives as null and must not wipe the saved value.
+    bot_config.update(body.model_dump(exclude_unset=True, exclude_none=True))
+    refresh_active_symbols()
+    invalidate_indicators(periods)
+    run_in_background(save_json_async(CONFIG_FILE, dict(bot_config)))
     print("Bot settings updated.")
-    return JSONResponse({"status": "success"})
+    return success_response()
 
 # --- CORE BOT LOGIC ---
+# One Bot per token, all sharing a single pooled HTTPX client, so fan-out to several accounts reuses connections.
+class OrjsonRequest(HTTPXRequest):
+    # Telegram replies are parsed with orjson; anything it rejects goes through the stock parser,
+    # which replaces bad UTF-8 and raises the usual TelegramError.
+    @staticmethod
+    def parse_json_payload(payload):
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            return HTTPXRequest.parse_json_payload(payload)
+
+_telegram_request = OrjsonRequest(connection_pool_size=16)
+_bot_cache: Dict[str, telegram.Bot] = {}
+# Caps concurrent sends so a burst can't exhaust the shared pool.
+_telegram_send_slots = asyncio.Semaphore(8)
+
+def get_bot(token):
+    bot = _bot_cache.get(token)
+    if bot is None:
+        bot = _bot_cache[token] = telegram.Bot(token=token, request=_telegram_request)
+    return bot
+
 async def send_single_telegram_message(token, chat_id, message):
     try:
-        bot = telegram.Bot(token=token)
-        await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+        bot = get_bot(token)
+        async with _telegram_send_slots:
+            await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
         print(f"Sent message to chat_id {chat_id}")
     except Exception as e:
         print(f"Error sending to chat_id {chat_id}: {e}")
@@ -542,18 +894,21 @@ async def send_telegram_message(message: str):
 @app.post("/api/test_telegram")
 async def test_telegram():
     await send_telegram_message("✅ Admin Panel Test: Your Telegram connection is working!")
-    return JSONResponse({"status": "success"})
+    return success_response()
 
 @app.post("/api/force_check")
 async def force_check():
-    asyncio.create_task(check_signals())
-    return JSONResponse({"status": "check_started"})
+    # Only the scheduler worker may check (it owns open_trades, the check lock and the candle stream),
+    # so any worker just touches the flag file and signal_loop in that worker picks it up.
+    with open(FORCE_CHECK_FILE, 'a'): pass
+    os.utime(FORCE_CHECK_FILE)
+    return ORJSONResponse({"status": "check_started"})
 
 @app.post("/api/fake_signal")
 async def fake_signal():
     try:
         # Fetch the current price for a more realistic fake signal
-        ticker = await binance.fetch_ticker('BTC/USDT')
+        ticker = await binance_futures.fetch_ticker('BTC/USDT')
         price = ticker['last']
         atr = price * 0.01 # Use a simple ATR estimation for the fake signal
     except Exception:
@@ -561,97 +916,345 @@ async def fake_signal():
         price = random.uniform(60000, 70000)
         atr = price * 0.01
 
+    sync_shared_state()
     sl = price - (atr * bot_config['atr_stop_loss_factor'])
     entry = {
-        "time": datetime.now().strftime("%Y-%m-%d %H:%M"), "asset": "BTC/USDT",
-        "type": "Long", "entry_price": f"{price:,.2f}", "sl_price": f"{sl:,.2f}"
+        "time": timestamp("%Y-%m-%d %H:%M"), "asset": "BTC/USDT",
+        "type": "Long", "entry": float(price), "sl": float(sl)
+    }
+    add_to_history(entry)
+    run_in_background(append_history(entry))
+    run_in_background(send_telegram_message(f"🧪 FAKE SIGNAL: See history for details."))
+    return ORJSONResponse({"status": "fake_signal_generated"})
+
+async def get_market_data(s, t, l=201):
+    # One contiguous float64 array per OHLCV column, ready for the compiled seed kernel.
+    candles = np.asarray(await binance_futures.fetch_ohlcv(s, t, limit=l), dtype=np.float64).reshape(-1, 6)
+    return dict(zip(('t', 'o', 'h', 'l', 'c', 'v'), np.ascontiguousarray(candles.T)))
+
+# --- Incremental indicators ---
+# INDICATOR_STATE holds, per (symbol, timeframe), the indicator values as of the last closed candle. A check
+# fetches only the last UPDATE_CANDLES candles, rolls the state forward over the ones that closed since
+# (EMA, Wilder RSI/ATR and the volume window all update in O(1)), and evaluates the still-forming candle on
+# top of it. The full SEED_CANDLES history is fetched only to seed a pair, after missed candles, or when an
+# indicator period changes.
+SEED_CANDLES = 201
+UPDATE_CANDLES = 3
+INDICATOR_PERIOD_KEYS = ('ema_short_period', 'ema_long_period', 'ema_entry_period', 'rsi_period', 'atr_period', 'volume_avg_period')
+INDICATOR_STATE: Dict[tuple, dict] = {}
+
+def indicator_periods(cfg): return tuple(cfg[k] for k in INDICATOR_PERIOD_KEYS)
+
+def invalidate_indicators(old_periods):
+    # Seeded state only holds for the periods it was built with, so a settings change that moves them drops it all.
+    if indicator_periods(bot_config) != old_periods: INDICATOR_STATE.clear()
+
+def seed_kernel(h, l, c, ema_s_p, ema_l_p, ema_e_p, rsi_p, atr_p):
+    # One pass over the closed candles, returning (ema_s, ema_l, ema_e, avg_gain, avg_loss, atr) at the last one.
+    # Every average is seeded the way talib does it, with the plain mean of its first `period` inputs,
+    # so the values match talib.EMA/RSI/ATR. A value is NaN while there are too few candles for it.
+    n = len(c)
+    ema_periods = (ema_s_p, ema_l_p, ema_e_p)
+    emas = np.zeros(3)
+    avg_gain = avg_loss = atr = 0.0
+    for i in range(n):
+        for k in range(3):
+            p = ema_periods[k]
+            if i < p:
+                emas[k] += c[i]
+                if i == p - 1: emas[k] /= p
+            else:
+                emas[k] += 2.0 / (p + 1) * (c[i] - emas[k])
+        if i == 0: continue
+        change = c[i] - c[i - 1]
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if i <= rsi_p:
+            avg_gain += gain
+            avg_loss += loss
+            if i == rsi_p:
+                avg_gain /= rsi_p
+                avg_loss /= rsi_p
+        else:
+            avg_gain = (avg_gain * (rsi_p - 1) + gain) / rsi_p
+            avg_loss = (avg_loss * (rsi_p - 1) + loss) / rsi_p
+        true_range = max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1]))
+        if i <= atr_p:
+            atr += true_range
+            if i == atr_p: atr /= atr_p
+        else:
+            atr = (atr * (atr_p - 1) + true_range) / atr_p
+    out = np.full(6, np.nan)
+    for k in range(3):
+        if n >= ema_periods[k]: out[k] = emas[k]
+    if n > rsi_p:
+        out[3] = avg_gain
+        out[4] = avg_loss
+    if n > atr_p: out[5] = atr
+    return out
+
+@lru_cache(maxsize=1)
+def compiled_seed_kernel():
+    # numba is imported, and the kernel compiled, only when the first pair is seeded, so workers that just
+    # serve the dashboard never load it. Without numba the kernel runs as plain Python: same values, slower.
+    try:
+        from numba import njit
+    except ImportError:
+        return seed_kernel
+    return njit(cache=True)(seed_kernel)
+
+def warm_seed_kernel():
+    # numba compiles on the first call, which takes the better part of a second. Called once through
+    # asyncio.to_thread before the first check, so that compile never runs on the event loop.
+    compiled_seed_kernel()(np.zeros(2), np.zeros(2), np.zeros(2), 1, 1, 1, 1, 1)
+
+def seed_state(d, periods):
+    # Indicators at the last closed candle (the last one is still forming).
+    # Returns None while the history is too short for every indicator to be defined.
+    ema_s_p, ema_l_p, ema_e_p, rsi_p, atr_p, vol_p = periods
+    values = compiled_seed_kernel()(d['h'][:-1], d['l'][:-1], d['c'][:-1], ema_s_p, ema_l_p, ema_e_p, rsi_p, atr_p)
+    if np.isnan(values).any(): return None
+    ema_s, ema_l, ema_e, avg_gain, avg_loss, atr = values.tolist()
+    return {
+        'periods': periods, 'ts': int(d['t'][-2]), 'close': float(d['c'][-2]),
+        'ema_s': ema_s, 'ema_l': ema_l, 'ema_e': ema_e, 'avg_gain': avg_gain, 'avg_loss': avg_loss,
+        'rsi': 100 * avg_gain / (avg_gain + avg_loss) if avg_gain + avg_loss else 0.0, 'atr': atr,
+        'volumes': deque(d['v'][:-1].tolist(), maxlen=vol_p),
     }
-    trade_history.appendleft(entry)
-    save_json(HISTORY_FILE, list(trade_history))
-    await send_telegram_message(f"🧪 FAKE SIGNAL: See history for details.")
-    return JSONResponse({"status": "fake_signal_generated"})
-
-async def get_market_data(s, t, l=201): return pd.DataFrame(await binance.fetch_ohlcv(s, t, limit=l), columns=['t', 'o', 'h', 'l', 'c', 'v'])
-
-def calculate_indicators(df, cfg):
-    df['ema_s'] = talib.EMA(df['c'], cfg['ema_short_period'])
-    df['ema_l'] = talib.EMA(df['c'], cfg['ema_long_period'])
-    df['ema_e'] = talib.EMA(df['c'], cfg['ema_entry_period'])
-    df['rsi'] = talib.RSI(df['c'], cfg['rsi_period'])
-    df['atr'] = talib.ATR(df['h'], df['l'], df['c'], cfg['atr_period'])
-    df['vol_avg'] = df['v'].rolling(cfg['volume_avg_period']).mean()
-    return df
+
+def step_indicators(state, candle):
+    # Indicator values for `candle`, given the state as of the candle before it.
+    _, _, h, l, c, _ = candle
+    ema_s_p, ema_l_p, ema_e_p, rsi_p, atr_p, _ = state['periods']
+    prev_close = state['close']
+    change = c - prev_close
+    avg_gain = (state['avg_gain'] * (rsi_p - 1) + max(change, 0.0)) / rsi_p
+    avg_loss = (state['avg_loss'] * (rsi_p - 1) + max(-change, 0.0)) / rsi_p
+    true_range = max(h - l, abs(h - prev_close), abs(l - prev_close))
+    return {
+        'ts': int(candle[0]), 'close': c,
+        'ema_s': state['ema_s'] + 2 / (ema_s_p + 1) * (c - state['ema_s']),
+        'ema_l': state['ema_l'] + 2 / (ema_l_p + 1) * (c - state['ema_l']),
+        'ema_e': state['ema_e'] + 2 / (ema_e_p + 1) * (c - state['ema_e']),
+        'avg_gain': avg_gain, 'avg_loss': avg_loss,
+        'rsi': 100 * avg_gain / (avg_gain + avg_loss) if avg_gain + avg_loss else 0.0,
+        'atr': (state['atr'] * (atr_p - 1) + true_range) / atr_p,
+    }
+
+def advance_state(state, candles, tf_ms):
+    # Commits the candles that closed since the state was built. Returns False if some were missed.
+    new = [c for c in candles[:-1] if c[0] > state['ts']]
+    expected = state['ts'] + tf_ms
+    for candle in new + [candles[-1]]:
+        if candle[0] != expected: return False
+        expected += tf_ms
+    for candle in new:
+        state.update(step_indicators(state, candle))
+        state['volumes'].append(candle[5])
+    return True
+
+def current_indicators(state, candle):
+    # Values for the forming candle (the old iloc[-1] row) plus the RSI of the last closed one (iloc[-2]).
+    values = step_indicators(state, candle)
+    period = state['periods'][5]
+    window = list(state['volumes'])[-(period - 1):] if period > 1 else []
+    values.update({'v': candle[5], 'prev_rsi': state['rsi'],
+                   'vol_avg': (sum(window) + candle[5]) / period if len(window) == period - 1 else float('nan')})
+    return values
+
+# The newest few candles per (symbol, timeframe), pushed by one multiplexed kline websocket.
+# While a key is fresh the check reads it instead of polling REST; otherwise it falls back to fetch_ohlcv.
+STREAMED_CANDLES: Dict[tuple, list] = {}
+_candle_watcher: Optional[asyncio.Task] = None
+
+def merge_candle(candles, candle):
+    if candles and candles[-1][0] == candle[0]: candles[-1] = candle
+    elif not candles or candles[-1][0] < candle[0]:
+        candles.append(candle)
+        del candles[:-UPDATE_CANDLES]
+
+def streamed_candles(key, tf_ms):
+    # Only usable while the last pushed candle is still the one forming now.
+    candles = STREAMED_CANDLES.get(key)
+    if candles and candles[-1][0] + tf_ms > time.time() * 1000: return candles
+    return None
+
+async def watch_candles():
+    failures, aliases, aliased = 0, {}, None
+    while True:
+        cfg = bot_config
+        symbols = ACTIVE_SYMBOLS
+        subscriptions = [[s, tf] for s in symbols for tf in cfg['higher_timeframes'] + [cfg['entry_timeframe']]]
+        try:
+            if not subscriptions:
+                await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+                continue
+            update = await binance_pro_futures.watch_ohlcv_for_symbols(subscriptions)
+            if symbols is not aliased:
+                # The stream reports unified market symbols (BTC/USDT:USDT), the config uses BTC/USDT.
+                aliases, aliased = {binance_pro_futures.symbol(s): s for s in symbols}, symbols
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Whatever was pushed before the drop may be missing a final update, so don't trust it.
+            failures += 1
+            STREAMED_CANDLES.clear()
+            print(f"Candle stream error: {e}")
+            await asyncio.sleep(min(failures, 5))
+            continue
+
+        failures = 0
+        for market_symbol, by_tf in update.items():
+            for tf, candles in by_tf.items():
+                key = (aliases.get(market_symbol, market_symbol), tf)
+                for candle in candles:
+                    merge_candle(STREAMED_CANDLES.setdefault(key, []), list(candle))
+
+async def get_indicators(symbol, tf, periods):
+    key = (symbol, tf)
+    state = INDICATOR_STATE.get(key)
+    if state is not None and state['periods'] == periods:
+        tf_ms = binance_futures.parse_timeframe(tf) * 1000
+        candles = streamed_candles(key, tf_ms) or await binance_futures.fetch_ohlcv(symbol, tf, limit=UPDATE_CANDLES)
+        if candles and advance_state(state, candles, tf_ms):
+            return current_indicators(state, candles[-1])
+
+    d = await get_market_data(symbol, tf, SEED_CANDLES)
+    if len(d['c']) < 2: return None
+    forming = [float(d[k][-1]) for k in ('t', 'o', 'h', 'l', 'c', 'v')]
+    state = seed_state(d, periods)
+    if state is None:
+        INDICATOR_STATE.pop(key, None)
+        return None
+    INDICATOR_STATE[key] = state
+    return current_indicators(state, forming)
+
+ENTRY_FIELDS = ('close', 'ema_e', 'rsi', 'prev_rsi', 'v', 'vol_avg', 'atr')
+
+def evaluate_signals(rows, thresholds):
+    # rows holds, per symbol, the indicator values of every timeframe (entry timeframe last).
+    # Returns (signal_type, entry_price, atr) or None per symbol. All symbols are evaluated together: each
+    # field becomes an array across symbols, with NaN for a timeframe without enough history, so no
+    # comparison involving it passes and the conditions reduce to a few elementwise masks.
+    if not rows: return []
+    rsi_oversold, rsi_overbought, volume_factor = thresholds
+    nan = float('nan')
+    spreads = np.array([[v['ema_s'] - v['ema_l'] if v else nan for v in values[:-1]] for values in rows], dtype=np.float64)
+    entry = np.array([[values[-1][f] for f in ENTRY_FIELDS] if values[-1] else [nan] * len(ENTRY_FIELDS)
+                      for values in rows], dtype=np.float64)
+    close, ema_e, rsi, prev_rsi, v, vol_avg, atr = entry.T
+    volume_ok = v > volume_factor * vol_avg
+    long_mask = (((spreads > 0).sum(axis=1) >= 2) & (prev_rsi < rsi_oversold) & (rsi > rsi_oversold) &
+                 volume_ok & (close > ema_e))
+    short_mask = (((spreads < 0).sum(axis=1) >= 2) & (prev_rsi > rsi_overbought) & (rsi < rsi_overbought) &
+                  volume_ok & (close < ema_e))
+    signals = [None] * len(rows)
+    for i in np.flatnonzero(long_mask | short_mask):
+        signals[i] = ("Long" if long_mask[i] else "Short", float(close[i]), float(atr[i]))
+    return signals
+
+SIGNAL_TEMPLATE = ("🚨 <b>{side} {symbol}</b>\n\n"
+                   "<b>Entry:</b> ${entry:,.2f}\n"
+                   "<b>Stop Loss:</b> ${sl:,.2f}\n"
+                   "<b>Take Profit:</b> ${tp:,.2f}")
 
 async def process_signal(symbol, signal_type, entry_price, atr):
-    global open_trades
-    open_trades += 1
-    
-    sl_factor = bot_config['atr_stop_loss_factor']
-    tp_factor = bot_config['atr_take_profit_factor']
-    
-    if signal_type == "Long":
-        sl_price = entry_price - (atr * sl_factor); tp_price = entry_price + (atr * tp_factor)
-    else: # Short
-        sl_price = entry_price + (atr * sl_factor); tp_price = entry_price - (atr * sl_factor)
+    # Long: stop below, target above the entry. Short mirrors both through the sign.
+    sign = 1 if signal_type == "Long" else -1
+    sl_price = entry_price - sign * atr * bot_config['atr_stop_loss_factor']
+    tp_price = entry_price + sign * atr * bot_config['atr_take_profit_factor']
 
     trade_entry = {
-        "time": datetime.now().strftime("%Y-%m-%d %H:%M"), "asset": symbol,
-        "type": signal_type, "entry_price": f"{entry_price:,.2f}", "sl_price": f"{sl_price:,.2f}"
+        "time": timestamp("%Y-%m-%d %H:%M"), "asset": symbol,
+        "type": signal_type, "entry": float(entry_price), "sl": float(sl_price)
     }
-    trade_history.appendleft(trade_entry)
-    save_json(HISTORY_FILE, list(trade_entry))
-
-    msg = (f"🚨 <b>{signal_type.upper()} {symbol}</b>\n\n"
-           f"<b>Entry:</b> ${entry_price:,.2f}\n"
-           f"<b>Stop Loss:</b> ${sl_price:,.2f}\n"
-           f"<b>Take Profit:</b> ${tp_price:,.2f}")
-    await send_telegram_message(msg)
+    add_to_history(trade_entry)
+    run_in_background(append_history(trade_entry))
+
+    # Notifying is not part of recording the signal, so a slow Telegram API doesn't hold up the check.
+    run_in_background(send_telegram_message(SIGNAL_TEMPLATE.format(side=signal_type.upper(), symbol=symbol,
+                                                                    entry=entry_price, sl=sl_price, tp=tp_price)))
     print(f"!!! {signal_type.upper()} SIGNAL for {symbol} !!!")
 
+def take_trade_slot(max_open_trades):
+    # Taking the slot is the increment. There is no await between the check and the increment, so two
+    # coroutines can never both take the last slot.
+    global open_trades
+    if open_trades >= max_open_trades: return False
+    open_trades += 1
+    return True
+
+async def symbol_indicators(symbol, timeframes, periods):
+    # All timeframes of the symbol are fetched concurrently; ccxt's rate limiter still spaces the requests out.
+    return await asyncio.gather(*[get_indicators(symbol, tf, periods) for tf in timeframes])
+
+# Held for a whole check. A check requested while one is running (a forced check during the
+# scheduled one, or a slow run) is dropped rather than queued, since it would see the same candles.
+_check_lock = asyncio.Lock()
+
 async def check_signals():
-    global open_trades, bot_status
-    bot_status["last_check"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    if open_trades >= bot_config['max_open_trades']: return
+    if _check_lock.locked(): return
+    async with _check_lock:
+        await run_check()
 
-    for symbol in bot_config['active_symbols']:
-        try:
-            binance.options['defaultType'] = 'future'
-            htf_data = await asyncio.gather(*[get_market_data(symbol, tf) for tf in bot_config['higher_timeframes']])
-            
-            long_align, short_align = 0, 0
-            for df_htf in htf_data:
-                if df_htf.empty: continue
-                df_htf = calculate_indicators(df_htf, bot_config)
-                if df_htf['ema_s'].iloc[-1] > df_htf['ema_l'].iloc[-1]: long_align += 1
-                if df_htf['ema_s'].iloc[-1] < df_htf['ema_l'].iloc[-1]: short_align += 1
-
-            df_5m = await get_market_data(symbol, bot_config['entry_timeframe'])
-            if df_5m.empty: continue
-            df_5m = calculate_indicators(df_5m, bot_config)
-            last, prev = df_5m.iloc[-1], df_5m.iloc[-2]
-            
-            if long_align >= 2 and (prev['rsi'] < bot_config['rsi_oversold'] and last['rsi'] > bot_config['rsi_oversold'] and
-                last['v'] > bot_config['volume_factor'] * last['vol_avg'] and last['c'] > last['ema_e']):
-                await process_signal(symbol, "Long", last['c'], last['atr'])
-                if open_trades >= bot_config['max_open_trades']: break
-                continue
+async def run_check():
+    global bot_status
+    sync_shared_state()
+    bot_status["last_check"] = timestamp()
+    run_in_background(save_json_async(STATUS_FILE, {"last_check": bot_status["last_check"]}))
+    # Settings are read once per check; every symbol and timeframe below uses the same values.
+    cfg = dict(bot_config)
+    max_open_trades = cfg['max_open_trades']
+    if open_trades >= max_open_trades: return
+    symbols = ACTIVE_SYMBOLS
+    timeframes = cfg['higher_timeframes'] + [cfg['entry_timeframe']]
+    periods = indicator_periods(cfg)
+    thresholds = (cfg['rsi_oversold'], cfg['rsi_overbought'], cfg['volume_factor'])
 
-            if short_align >= 2 and (prev['rsi'] > bot_config['rsi_overbought'] and last['rsi'] < bot_config['rsi_overbought'] and
-                last['v'] > bot_config['volume_factor'] * last['vol_avg'] and last['c'] < last['ema_e']):
-                await process_signal(symbol, "Short", last['c'], last['atr'])
-                if open_trades >= bot_config['max_open_trades']: break
+    # Fetch every symbol at once, evaluate them together, then open trades in symbol order until
+    # max_open_trades is reached. A symbol whose fetch failed is evaluated as having no data.
+    results = await asyncio.gather(*[symbol_indicators(symbol, timeframes, periods) for symbol in symbols],
+                                   return_exceptions=True)
+    signals = evaluate_signals([[None] * len(timeframes) if isinstance(r, Exception) else r for r in results], thresholds)
+    for symbol, result, signal in zip(symbols, results, signals):
+        try:
+            if isinstance(result, Exception): raise result
+            if not signal: continue
+            if not take_trade_slot(max_open_trades): break
+            await process_signal(symbol, *signal)
 
         except Exception as e: 
             error_message = f"Signal Check Error: {e}"
             print(f"Error checking {symbol}: {error_message}")
             bot_status["last_error"] = error_message
 
+CHECK_INTERVAL_SECONDS = 5 * 60
+FORCE_CHECK_POLL_SECONDS = 1
+_signal_loop_task: Optional[asyncio.Task] = None
+
+async def signal_loop():
+    await asyncio.to_thread(warm_seed_kernel)
+    while True:
+        try:
+            await check_signals()
+        except Exception as e:
+            print(f"Signal loop error: {e}")
+            bot_status["last_error"] = f"Signal Check Error: {e}"
+        await wait_for_next_check()
+
+async def wait_for_next_check():
+    # Sleeps until the next scheduled check, waking early once /api/force_check (in any worker) touched FORCE_CHECK_FILE.
+    deadline = time.monotonic() + CHECK_INTERVAL_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(FORCE_CHECK_POLL_SECONDS)
+        if file_changed(FORCE_CHECK_FILE): return
+
 @app.on_event("startup")
 async def startup_event():
-    global bot_status
+    global bot_status, _price_watcher, _signal_loop_task, _candle_watcher
+    open_http_session()
     try:
-        await binance.load_markets()
-        await binance.fetch_time()
+        await asyncio.gather(binance_futures.load_markets(), binance_spot.load_markets())
+        await binance_futures.fetch_time()
         bot_status["binance_connection"] = "Connected"
         print("Successfully connected to Binance.")
     except Exception as e:
@@ -659,11 +1262,23 @@ async def startup_event():
         bot_status["last_error"] = str(e)
         print(f"!!! FAILED to connect to Binance: {e}")
 
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_signals, 'interval', minutes=5, misfire_grace_time=60)
-    scheduler.start()
-    print("FastAPI server started. Background checker is running.")
-    asyncio.create_task(check_signals())
+    _price_watcher = asyncio.create_task(watch_live_prices())
+
+    if not acquire_scheduler_lock():
+        print(f"FastAPI worker {os.getpid()} started. Background checker runs in another worker.")
+        return
+    _candle_watcher = asyncio.create_task(watch_candles())
+    _signal_loop_task = asyncio.create_task(signal_loop())
+    print(f"FastAPI worker {os.getpid()} started. Background checker is running.")
 
 @app.on_event("shutdown")
-async def shutdown_event(): await binance.close()
+async def shutdown_event():
+    for task in (_price_watcher, _candle_watcher, _signal_loop_task):
+        if task: task.cancel()
+    await asyncio.gather(binance_futures.close(), binance_spot.close(), binance_pro_futures.close(), binance_pro_spot.close(),
+                         *[bot.shutdown() for bot in _bot_cache.values()], return_exceptions=True)
+    if _http_session: await _http_session.close()
+
+if __name__ == "__main__":
+    # "auto" picks uvloop when it is installed (see requirements.txt) and falls back to asyncio elsewhere.
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="auto")